@@ -59,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',  # Add this line
+    'atsu_app.middleware.EntitlementMiddleware',
 ]
 
 ROOT_URLCONF = 'ATSU.urls'
@@ -114,6 +115,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'atsu_app.context_processors.entitlements',
             ],
         },
     },
@@ -174,6 +176,57 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ==============================================================================
+# RESULTS PAGE CACHE SETTINGS
+# ==============================================================================
+
+# Lifetime of cached results fragments (breakdown, keywords, improvements).
+# Keys include the analysis version, so edits never serve stale fragments.
+RESULTS_FRAGMENT_CACHE_TTL = config('RESULTS_FRAGMENT_CACHE_TTL', default=86400, cast=int)  # 24 hours
+
+# ==============================================================================
+# ENTITLEMENT SNAPSHOT SETTINGS
+# ==============================================================================
+
+# Bump to invalidate every user's session entitlement snapshot at once
+ENTITLEMENTS_VERSION = config('ENTITLEMENTS_VERSION', default=1, cast=int)
+
+# Maximum age of a snapshot before it is rebuilt from the plan and counters
+ENTITLEMENTS_SNAPSHOT_TTL = config('ENTITLEMENTS_SNAPSHOT_TTL', default=300, cast=int)  # 5 minutes
+
+# ==============================================================================
+# ANALYSIS SCHEDULER SETTINGS
+# ==============================================================================
+
+ANALYSIS_SCHEDULER_CONFIG = {
+    # Worker threads shared by extraction, OCR, LLM paraphrasing and matching
+    'WORKERS': config('ANALYSIS_WORKERS', default=4, cast=int),
+
+    # Share of the workers each tier gets while both have jobs queued
+    'TIER_WEIGHTS': {
+        'premium': 4,
+        'freemium': 1,
+    },
+
+    # Queued jobs per tier before new ones are rejected with 429
+    'MAX_QUEUE_DEPTH': {
+        'premium': config('ANALYSIS_MAX_QUEUE_DEPTH_PREMIUM', default=50, cast=int),
+        'freemium': config('ANALYSIS_MAX_QUEUE_DEPTH_FREEMIUM', default=100, cast=int),
+    },
+
+    # Jobs a single user may have running at once
+    'USER_CONCURRENCY': {
+        'premium': 2,
+        'freemium': 1,
+    },
+
+    # Jobs a single user may have waiting at once
+    'MAX_QUEUED_PER_USER': config('ANALYSIS_MAX_QUEUED_PER_USER', default=3, cast=int),
+
+    # Job duration used for wait estimates until real timings come in
+    'ESTIMATED_JOB_SECONDS': config('ANALYSIS_ESTIMATED_JOB_SECONDS', default=10, cast=int),
+}
+
 # ==============================================================================
 # N8N INTEGRATION SETTINGS
 # ==============================================================================
@@ -1,3 +1,47 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Analysis, MissingKeywordRollup, ScoreRollup, ScoreSegment, UserPlan, UserProgressRollup
+
+
+@admin.register(Analysis)
+class AnalysisAdmin(admin.ModelAdmin):
+    list_display = ('job_title', 'company_name', 'user', 'score', 'version', 'updated_at')
+    list_filter = ('created_at',)
+    search_fields = ('job_title', 'company_name', 'user__username')
+    readonly_fields = ('version', 'created_at', 'updated_at')
+
+
+@admin.register(ScoreSegment)
+class ScoreSegmentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'row_count', 'created_at')
+    fields = ('row_count', 'created_at')
+    readonly_fields = ('row_count', 'created_at')
+
+
+@admin.register(ScoreRollup)
+class ScoreRollupAdmin(admin.ModelAdmin):
+    list_display = ('key', 'dimension', 'count', 'average_score', 'updated_at')
+    list_filter = ('dimension',)
+    search_fields = ('key',)
+
+
+@admin.register(MissingKeywordRollup)
+class MissingKeywordRollupAdmin(admin.ModelAdmin):
+    list_display = ('keyword', 'country', 'count')
+    list_filter = ('country',)
+    search_fields = ('keyword',)
+
+
+@admin.register(UserProgressRollup)
+class UserProgressRollupAdmin(admin.ModelAdmin):
+    list_display = ('user', 'analysis_count', 'first_score', 'latest_score', 'best_score',
+                    'average_score', 'improvement', 'latest_analysed_at')
+    search_fields = ('user__username',)
+
+
+@admin.register(UserPlan)
+class UserPlanAdmin(admin.ModelAdmin):
+    list_display = ('user', 'tier', 'started_at', 'expires_at', 'is_active', 'version')
+    list_filter = ('tier',)
+    search_fields = ('user__username',)
+    readonly_fields = ('version',)
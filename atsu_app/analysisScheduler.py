@@ -0,0 +1,305 @@
+"""
+Analysis Scheduler Module
+Runs heavy analysis work (extraction, OCR, LLM paraphrasing, batch matching)
+on a fixed pool of workers, sharing it between plan tiers by weight.
+
+This is the scheduling layer only: no endpoint submits work yet, since the
+app has no analysis pipeline. Once one exists, its views should go through
+`submit_analysis` and answer `SchedulerBusy` with `busy_response`.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+
+from .models import UserPlan
+
+
+class SchedulerBusy(Exception):
+    """Raised when a job is rejected because its queue is full."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ('user_key', 'tier', 'func', 'args', 'kwargs', 'future', 'enqueued_at')
+
+    def __init__(self, user_key, tier, func, args, kwargs):
+        self.user_key = user_key
+        self.tier = tier
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class AnalysisScheduler:
+    """
+    Weighted fair queueing in front of a fixed worker pool.
+
+    Each tier has its own bounded FIFO queue. Workers pick the tier with the
+    lowest virtual pass (stride scheduling), so with weights 4:1 Premium
+    gets four jobs for every Freemium job while both are queued, and
+    either tier gets the whole pool when the other is idle. A user never
+    has more than their tier's concurrency cap running at once.
+    """
+
+    # Weight given to the newest sample in the wait and job time averages
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, workers, weights, max_depth, user_concurrency,
+                 max_queued_per_user, estimated_job_seconds):
+        self.workers = workers
+        self.weights = dict(weights)
+        self.max_depth = dict(max_depth)
+        self.user_concurrency = dict(user_concurrency)
+        self.max_queued_per_user = max_queued_per_user
+
+        self._cond = threading.Condition()
+        self._threads = []
+        self._queues = {tier: deque() for tier in self.weights}
+        self._pass = {tier: 0.0 for tier in self.weights}
+        self._virtual_time = 0.0
+        self._queued_by_user = {}
+        self._running_by_user = {}
+        self._busy = 0
+        self._job_seconds = float(estimated_job_seconds)
+        self._wait_seconds = {tier: 0.0 for tier in self.weights}
+        self._counters = {
+            tier: {'submitted': 0, 'rejected': 0, 'completed': 0}
+            for tier in self.weights
+        }
+
+    # ------------------------------------------------------------------
+    # Submitting work
+    # ------------------------------------------------------------------
+
+    def submit(self, user_key, tier, func, *args, **kwargs):
+        """
+        Queue `func(*args, **kwargs)` for a user at their plan tier.
+
+        Args:
+            user_key: Identifies the user for concurrency caps
+            tier: UserPlan tier the job is scheduled under
+
+        Returns:
+            Future: Resolves with the result of `func`
+
+        Raises:
+            SchedulerBusy: If the tier's queue or the user's backlog is full
+        """
+        with self._cond:
+            queue = self._queues[tier]
+            if len(queue) >= self.max_depth[tier]:
+                self._counters[tier]['rejected'] += 1
+                raise SchedulerBusy('The analysis queue is full.', self._retry_after(tier))
+            if self._queued_by_user.get(user_key, 0) >= self.max_queued_per_user:
+                self._counters[tier]['rejected'] += 1
+                raise SchedulerBusy('You already have analyses waiting.', self._retry_after(tier))
+
+            # A tier returning from idle must not spend credit built up while away
+            if not queue:
+                self._pass[tier] = max(self._pass[tier], self._virtual_time)
+
+            job = _Job(user_key, tier, func, args, kwargs)
+            queue.append(job)
+            self._queued_by_user[user_key] = self._queued_by_user.get(user_key, 0) + 1
+            self._counters[tier]['submitted'] += 1
+
+            self._start_workers()
+            self._cond.notify()
+
+        return job.future
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work,
+                name=f'analysis-worker-{len(self._threads)}',
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _next_job(self):
+        """Pop the next dispatchable job. Caller must hold the lock."""
+        best_tier = best_job = None
+        for tier, queue in self._queues.items():
+            if best_tier is not None and self._pass[tier] >= self._pass[best_tier]:
+                continue
+            cap = self.user_concurrency[tier]
+            for job in queue:
+                if self._running_by_user.get(job.user_key, 0) < cap:
+                    best_tier, best_job = tier, job
+                    break
+
+        if best_job is None:
+            return None
+
+        self._queues[best_tier].remove(best_job)
+        self._virtual_time = self._pass[best_tier]
+        self._pass[best_tier] += 1 / self.weights[best_tier]
+        return best_job
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+
+                self._queued_by_user[job.user_key] -= 1
+                if not self._queued_by_user[job.user_key]:
+                    del self._queued_by_user[job.user_key]
+                self._running_by_user[job.user_key] = self._running_by_user.get(job.user_key, 0) + 1
+                self._busy += 1
+                waited = time.monotonic() - job.enqueued_at
+                self._wait_seconds[job.tier] = self._average(self._wait_seconds[job.tier], waited)
+
+            started = time.monotonic()
+            if job.future.set_running_or_notify_cancel():
+                # Jobs use the ORM outside a request, so recycle this thread's
+                # connection the way request_started/finished would
+                close_old_connections()
+                try:
+                    job.future.set_result(job.func(*job.args, **job.kwargs))
+                except Exception as exc:
+                    job.future.set_exception(exc)
+                finally:
+                    close_old_connections()
+
+            with self._cond:
+                self._running_by_user[job.user_key] -= 1
+                if not self._running_by_user[job.user_key]:
+                    del self._running_by_user[job.user_key]
+                self._busy -= 1
+                self._job_seconds = self._average(self._job_seconds, time.monotonic() - started)
+                self._counters[job.tier]['completed'] += 1
+                # A finished job may unblock a capped user in any tier
+                self._cond.notify_all()
+
+    def _average(self, current, sample):
+        return current + self.EWMA_ALPHA * (sample - current)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def expected_wait(self, tier):
+        """
+        Estimate how long a job submitted now at `tier` would wait to start.
+
+        Returns:
+            float: Seconds
+        """
+        with self._cond:
+            return self._expected_wait(tier)
+
+    def _expected_wait(self, tier):
+        ahead = len(self._queues[tier])
+        if self._busy + ahead < self.workers:
+            return 0.0
+
+        active = [t for t, queue in self._queues.items() if queue or t == tier]
+        share = self.weights[tier] / sum(self.weights[t] for t in active)
+        return (ahead + 1) * self._job_seconds / (self.workers * share)
+
+    def _retry_after(self, tier):
+        return max(1, math.ceil(self._expected_wait(tier)))
+
+    def stats(self):
+        """
+        Get queue and worker statistics.
+
+        Returns:
+            dict: Pool usage plus depth, wait estimates and counters per tier
+        """
+        with self._cond:
+            return {
+                'workers': self.workers,
+                'busy': self._busy,
+                'average_job_seconds': round(self._job_seconds, 2),
+                'tiers': {
+                    tier: {
+                        'weight': self.weights[tier],
+                        'depth': len(queue),
+                        'max_depth': self.max_depth[tier],
+                        'expected_wait': round(self._expected_wait(tier), 1),
+                        'average_wait': round(self._wait_seconds[tier], 2),
+                        **self._counters[tier],
+                    }
+                    for tier, queue in self._queues.items()
+                },
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Get the process-wide scheduler, creating it from settings on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            config = settings.ANALYSIS_SCHEDULER_CONFIG
+            _scheduler = AnalysisScheduler(
+                workers=config['WORKERS'],
+                weights=config['TIER_WEIGHTS'],
+                max_depth=config['MAX_QUEUE_DEPTH'],
+                user_concurrency=config['USER_CONCURRENCY'],
+                max_queued_per_user=config['MAX_QUEUED_PER_USER'],
+                estimated_job_seconds=config['ESTIMATED_JOB_SECONDS'],
+            )
+        return _scheduler
+
+
+def tier_for_request(request):
+    """Get the plan tier a request's work is scheduled under."""
+    entitlements = getattr(request, 'entitlements', None)
+    return entitlements.tier if entitlements is not None else UserPlan.FREEMIUM
+
+
+def submit_analysis(request, func, *args, **kwargs):
+    """
+    Queue analysis work for the requesting user.
+
+    Usage:
+        try:
+            future = submit_analysis(request, extract_text, cv_file)
+        except SchedulerBusy as exc:
+            return busy_response(exc)
+
+    Raises:
+        SchedulerBusy: If the work cannot be queued
+    """
+    if request.user.is_authenticated:
+        user_key = f"user:{request.user.id}"
+    else:
+        user_key = f"anon:{request.META.get('REMOTE_ADDR', '')}"
+    return get_scheduler().submit(user_key, tier_for_request(request), func, *args, **kwargs)
+
+
+def busy_response(exc):
+    """429 response telling the client when to retry."""
+    response = JsonResponse({
+        'error': 'Too many requests',
+        'message': f'{exc} Please try again in {exc.retry_after} seconds.',
+        'retry_after': exc.retry_after
+    }, status=429)
+    response['Retry-After'] = str(exc.retry_after)
+    return response
@@ -0,0 +1,367 @@
+"""
+Analytics Store Module
+Appends analysis results to compact columnar segments and maintains the
+rollups behind the admin dashboards and the rolefinder. Rollups follow
+analyses through edits and deletes. Reads only touch rollup rows, never the
+raw history.
+"""
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Greatest
+
+from .models import (
+    Analysis,
+    AnalyticsKeyword,
+    MissingKeywordRollup,
+    ScoreRollup,
+    ScoreSegment,
+    UserProgressRollup,
+)
+
+
+class ScoreAnalytics:
+    """
+    Records analyses and serves precomputed score analytics.
+    """
+
+    # Default number of rows returned by the ranking queries
+    DEFAULT_LIMIT = 10
+
+    @staticmethod
+    def normalise(value):
+        """Normalise a role or keyword so rollups group consistently."""
+        return ' '.join(value.split()).lower()
+
+    @staticmethod
+    def default_country():
+        """Country used when none is given, shared with the job API."""
+        return settings.JOB_API_CONFIG['DEFAULTS']['COUNTRY']
+
+    @staticmethod
+    def country_for(analysis):
+        """
+        Get the country an analysis applies to, normalised like roles.
+
+        Uses the last part of the job location ("Gaborone, Botswana"),
+        falling back to the job API's default country.
+        """
+        country = analysis.job_location.rsplit(',', 1)[-1].strip()
+        return ScoreAnalytics.normalise(country or ScoreAnalytics.default_country())
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def record(analysis):
+        """
+        Add a new analysis to every rollup and append it to the store.
+
+        The rollups commit before the append starts, so a failed append
+        never costs the dashboards an analysis.
+
+        Args:
+            analysis: Saved Analysis object
+        """
+        with transaction.atomic():
+            ScoreAnalytics._apply(analysis, 1)
+            if analysis.user_id:
+                ScoreAnalytics._record_progress(analysis)
+        ScoreAnalytics._append(analysis)
+
+    @staticmethod
+    def update(previous, analysis):
+        """
+        Replace an edited analysis's contribution to the rollups.
+
+        The new version is appended to the segments as well, so they stay
+        a complete log of every recorded version.
+
+        Args:
+            previous: Analysis as it was before the edit
+            analysis: Analysis after the edit
+        """
+        with transaction.atomic():
+            ScoreAnalytics._apply(previous, -1)
+            ScoreAnalytics._apply(analysis, 1)
+            for user_id in {previous.user_id, analysis.user_id} - {None}:
+                ScoreAnalytics._rebuild_progress(user_id)
+        ScoreAnalytics._append(analysis)
+
+    @staticmethod
+    def remove(analysis):
+        """
+        Take a deleted analysis out of the rollups.
+
+        Args:
+            analysis: Analysis as it was before deletion
+        """
+        with transaction.atomic():
+            ScoreAnalytics._apply(analysis, -1)
+            if analysis.user_id:
+                ScoreAnalytics._rebuild_progress(analysis.user_id)
+
+    @staticmethod
+    def _append(analysis, attempts=5):
+        """
+        Append a row to the newest segment, in its own short transaction.
+
+        The newest segment is locked with SELECT ... FOR UPDATE where the
+        backend supports it. The write also only succeeds if the segment
+        still has the row count we read, which covers SQLite. If the newest
+        segment stays contended for `attempts` tries, the row starts a new
+        segment instead of being dropped.
+        """
+        found = ScoreAnalytics._terms(analysis, 'found')
+        missing = ScoreAnalytics._terms(analysis, 'missing')
+        keyword_ids = ScoreAnalytics._intern(found + missing)
+        row = {
+            'analysis_ids': analysis.pk,
+            'user_ids': analysis.user_id or 0,
+            'timestamps': int(analysis.updated_at.timestamp()),
+            'scores': analysis.score,
+            'keyword_match': analysis.keyword_match,
+            'skills_match': analysis.skills_match,
+            'experience_relevance': analysis.experience_relevance,
+            'format_structure': analysis.format_structure,
+            'found_ids': [keyword_ids[term] for term in found],
+            'missing_ids': [keyword_ids[term] for term in missing],
+        }
+
+        with transaction.atomic():
+            segments = ScoreSegment.objects.order_by('-id')
+            if connection.features.has_select_for_update:
+                segments = segments.select_for_update()
+
+            for _ in range(attempts):
+                segment = segments.first()
+                if segment is None or segment.is_full:
+                    break
+
+                expected_count = segment.row_count
+                segment.append_row(**row)
+                columns = {name: getattr(segment, name) for name in ScoreSegment.COLUMNS}
+                if ScoreSegment.objects.filter(pk=segment.pk, row_count=expected_count).update(
+                    row_count=segment.row_count, **columns
+                ):
+                    return segment
+
+            segment = ScoreSegment()
+            segment.append_row(**row)
+            segment.save()
+            return segment
+
+    @staticmethod
+    def _apply(analysis, sign):
+        """Add (sign=1) or subtract (sign=-1) an analysis's rollup contribution."""
+        role = ScoreAnalytics.normalise(analysis.job_title)
+        score = analysis.score * sign
+
+        if role:
+            ScoreAnalytics._increment(
+                ScoreRollup, {'dimension': ScoreRollup.ROLE, 'key': role},
+                count=sign, score_total=score,
+            )
+        for term in ScoreAnalytics._terms(analysis, 'found'):
+            ScoreAnalytics._increment(
+                ScoreRollup, {'dimension': ScoreRollup.SKILL, 'key': term},
+                count=sign, score_total=score,
+            )
+        country = ScoreAnalytics.country_for(analysis)
+        for term in ScoreAnalytics._terms(analysis, 'missing'):
+            ScoreAnalytics._increment(
+                MissingKeywordRollup, {'country': country, 'keyword': term},
+                count=sign,
+            )
+
+    @staticmethod
+    def _terms(analysis, status):
+        terms = {
+            ScoreAnalytics.normalise(keyword.get('term', ''))
+            for keyword in analysis.keywords
+            if keyword.get('status') == status
+        }
+        terms.discard('')
+        return sorted(terms)
+
+    @staticmethod
+    def _intern(terms):
+        """Map keyword terms to AnalyticsKeyword IDs, creating new ones."""
+        if not terms:
+            return {}
+        AnalyticsKeyword.objects.bulk_create(
+            [AnalyticsKeyword(term=term) for term in terms],
+            ignore_conflicts=True,
+        )
+        return dict(
+            AnalyticsKeyword.objects.filter(term__in=terms).values_list('term', 'id')
+        )
+
+    @staticmethod
+    def _increment(model, lookup, **amounts):
+        """
+        Add `amounts` to the rollup row matching `lookup`, creating it if
+        needed. Rows whose count drops to zero are deleted.
+        """
+        increments = {field: F(field) + amount for field, amount in amounts.items()}
+        if amounts['count'] < 0:
+            model.objects.filter(**lookup).update(**increments)
+            model.objects.filter(**lookup, count__lte=0).delete()
+            return
+
+        if not model.objects.filter(**lookup).update(**increments):
+            _, created = model.objects.get_or_create(**lookup, defaults=amounts)
+            if not created:
+                model.objects.filter(**lookup).update(**increments)
+
+    @staticmethod
+    def _record_progress(analysis):
+        score = analysis.score
+        increments = {
+            'analysis_count': F('analysis_count') + 1,
+            'score_total': F('score_total') + score,
+            'latest_score': score,
+            'best_score': Greatest(F('best_score'), score),
+            'latest_analysed_at': analysis.created_at,
+        }
+        if UserProgressRollup.objects.filter(user_id=analysis.user_id).update(**increments):
+            return
+
+        _, created = UserProgressRollup.objects.get_or_create(
+            user_id=analysis.user_id,
+            defaults={
+                'analysis_count': 1,
+                'score_total': score,
+                'first_score': score,
+                'latest_score': score,
+                'best_score': score,
+                'first_analysed_at': analysis.created_at,
+                'latest_analysed_at': analysis.created_at,
+            },
+        )
+        if not created:
+            UserProgressRollup.objects.filter(user_id=analysis.user_id).update(**increments)
+
+    @staticmethod
+    def _rebuild_progress(user_id):
+        """
+        Recompute a user's progress from their own analyses.
+
+        Only used after an edit or delete, where first/latest/best cannot be
+        corrected incrementally. Reads one user's analyses, not the history.
+        """
+        analyses = Analysis.objects.filter(user_id=user_id).order_by('created_at', 'pk')
+        totals = analyses.aggregate(count=Count('pk'), total=Sum('score'), best=Max('score'))
+        if not totals['count']:
+            UserProgressRollup.objects.filter(user_id=user_id).delete()
+            return
+
+        first = analyses.values('score', 'created_at').first()
+        latest = analyses.values('score', 'created_at').last()
+        UserProgressRollup.objects.update_or_create(
+            user_id=user_id,
+            defaults={
+                'analysis_count': totals['count'],
+                'score_total': totals['total'],
+                'first_score': first['score'],
+                'latest_score': latest['score'],
+                'best_score': totals['best'],
+                'first_analysed_at': first['created_at'],
+                'latest_analysed_at': latest['created_at'],
+            },
+        )
+
+    # ------------------------------------------------------------------
+    # Read API
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def average_score_by_role(limit=DEFAULT_LIMIT):
+        """
+        Get the most analysed roles with their average score.
+
+        Returns:
+            list: Dicts with 'role', 'count' and 'average_score'
+        """
+        return ScoreAnalytics._averages(ScoreRollup.ROLE, 'role', limit)
+
+    @staticmethod
+    def average_score_by_skill(limit=DEFAULT_LIMIT):
+        """
+        Get the most common skills with the average score of CVs having them.
+
+        Returns:
+            list: Dicts with 'skill', 'count' and 'average_score'
+        """
+        return ScoreAnalytics._averages(ScoreRollup.SKILL, 'skill', limit)
+
+    @staticmethod
+    def average_score_for_role(role):
+        """
+        Get the average score for a single role.
+
+        Returns:
+            float: Average score, or None if the role has no analyses
+        """
+        rollup = ScoreRollup.objects.filter(
+            dimension=ScoreRollup.ROLE, key=ScoreAnalytics.normalise(role)
+        ).first()
+        return rollup.average_score if rollup else None
+
+    @staticmethod
+    def most_missing_keywords(country=None, limit=DEFAULT_LIMIT):
+        """
+        Get the keywords most often missing from CVs for a country.
+
+        Args:
+            country: Country name in any case, defaults to the job API's
+                default country
+            limit: Maximum number of keywords
+
+        Returns:
+            list: Dicts with 'keyword' and 'count'
+        """
+        country = ScoreAnalytics.normalise(country or ScoreAnalytics.default_country())
+        return list(
+            MissingKeywordRollup.objects
+            .filter(country=country)
+            .order_by('-count', 'keyword')
+            .values('keyword', 'count')[:limit]
+        )
+
+    @staticmethod
+    def user_improvement(user):
+        """
+        Get a user's score progress across their analyses.
+
+        Args:
+            user: Django User object or user ID
+
+        Returns:
+            dict: Progress statistics, or None if the user has no analyses
+        """
+        user_id = user.id if hasattr(user, 'id') else user
+        progress = UserProgressRollup.objects.filter(user_id=user_id).first()
+        if progress is None:
+            return None
+
+        return {
+            'analyses': progress.analysis_count,
+            'first_score': progress.first_score,
+            'latest_score': progress.latest_score,
+            'best_score': progress.best_score,
+            'average_score': progress.average_score,
+            'improvement': progress.improvement,
+            'first_analysed_at': progress.first_analysed_at,
+            'latest_analysed_at': progress.latest_analysed_at,
+        }
+
+    @staticmethod
+    def _averages(dimension, label, limit):
+        rollups = ScoreRollup.objects.filter(dimension=dimension).order_by('-count', 'key')[:limit]
+        return [
+            {label: rollup.key, 'count': rollup.count, 'average_score': rollup.average_score}
+            for rollup in rollups
+        ]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AtsuAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'atsu_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
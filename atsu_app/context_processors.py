@@ -0,0 +1,3 @@
+def entitlements(request):
+    """Expose the entitlement snapshot to templates as `entitlements`."""
+    return {'entitlements': getattr(request, 'entitlements', None)}
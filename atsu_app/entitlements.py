@@ -0,0 +1,149 @@
+"""
+Entitlements Module
+Carries a signed, versioned snapshot of the user's plan and counters in the
+session, so templates and read-only views need no quota lookups. The only
+per-request check is the plan version, read from the cache.
+"""
+
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from .models import UserPlan
+from .uploadTrack import UploadTracker
+
+
+class Entitlements:
+    """
+    A user's plan tier, limits and usage as of the last snapshot.
+
+    Snapshots are rebuilt from the authoritative plan and counters when
+    they are missing, tampered with, older than ENTITLEMENTS_SNAPSHOT_TTL,
+    past the plan's expiry, for another user, behind the plan version
+    UserPlan publishes to the cache, or from an older ENTITLEMENTS_VERSION.
+    """
+
+    SESSION_KEY = '_entitlements'
+    SALT = 'atsu_app.entitlements'
+
+    def __init__(self, data):
+        self.data = data
+
+    @classmethod
+    def anonymous(cls):
+        """Freemium entitlements for visitors who are not logged in."""
+        return cls({
+            'v': settings.ENTITLEMENTS_VERSION,
+            'user': None,
+            'plan_version': 0,
+            'tier': UserPlan.FREEMIUM,
+            'expires': None,
+            'used': {'uploads': 0},
+        })
+
+    @classmethod
+    def build(cls, user):
+        """
+        Build entitlements from the authoritative plan and counters.
+
+        Args:
+            user: Django User object
+        """
+        if not user.is_authenticated:
+            return cls.anonymous()
+
+        plan = UserPlan.for_user(user)
+        active = plan is not None and plan.is_active
+        plan_version = plan.version if plan else 0
+        # Only fill a missing key: a version published since we read the plan wins
+        cache.add(UserPlan.version_cache_key(user.id), plan_version, None)
+        return cls({
+            'v': settings.ENTITLEMENTS_VERSION,
+            'user': user.id,
+            'plan_version': plan_version,
+            'tier': plan.tier if active else UserPlan.FREEMIUM,
+            'expires': plan.expires_at.timestamp() if active and plan.expires_at else None,
+            'used': {'uploads': UploadTracker.get_upload_count(user)},
+        })
+
+    @classmethod
+    def for_request(cls, request):
+        """
+        Get the entitlements for a request, from the session snapshot if it
+        is still valid.
+        """
+        if not request.user.is_authenticated:
+            return cls.anonymous()
+
+        token = request.session.get(cls.SESSION_KEY)
+        if token:
+            try:
+                data = signing.loads(token, salt=cls.SALT, max_age=settings.ENTITLEMENTS_SNAPSHOT_TTL)
+            except signing.BadSignature:
+                data = None
+            if data and cls._is_current(data, request.user):
+                return cls(data)
+
+        return cls.refresh(request)
+
+    @classmethod
+    def refresh(cls, request):
+        """Rebuild the snapshot and store it in the session."""
+        entitlements = cls.build(request.user)
+        if request.user.is_authenticated:
+            request.session[cls.SESSION_KEY] = signing.dumps(entitlements.data, salt=cls.SALT)
+        request.entitlements = entitlements
+        return entitlements
+
+    @staticmethod
+    def _is_current(data, user):
+        if data.get('v') != settings.ENTITLEMENTS_VERSION or data.get('user') != user.id:
+            return False
+        if data.get('plan_version') != UserPlan.current_version(user):
+            return False
+        expires = data.get('expires')
+        return expires is None or expires > time.time()
+
+    @property
+    def tier(self):
+        return self.data['tier']
+
+    @property
+    def plan_name(self):
+        return dict(UserPlan.TIER_CHOICES)[self.tier]
+
+    @property
+    def is_premium(self):
+        return self.tier == UserPlan.PREMIUM
+
+    @property
+    def limits(self):
+        return UserPlan.PLANS[self.tier]
+
+    @property
+    def expires_at(self):
+        expires = self.data['expires']
+        return datetime.fromtimestamp(expires, tz=timezone.utc) if expires else None
+
+    @property
+    def uploads_limit(self):
+        return self.limits['uploads']
+
+    @property
+    def uploads_used(self):
+        return self.data['used']['uploads']
+
+    @property
+    def uploads_remaining(self):
+        return max(0, self.uploads_limit - self.uploads_used)
+
+    @property
+    def can_upload(self):
+        return self.uploads_remaining > 0
+
+    def upload_stats(self):
+        """Upload statistics in the same shape as UploadTracker.get_upload_stats."""
+        return UploadTracker.build_upload_stats(self.uploads_used, self.uploads_limit)
@@ -0,0 +1,25 @@
+from django.utils.functional import SimpleLazyObject
+
+from .entitlements import Entitlements
+
+
+class EntitlementMiddleware:
+    """
+    Attach the user's entitlement snapshot to the request as
+    `request.entitlements`, and refresh it when a view changed a counter.
+
+    Must come after the session and authentication middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.entitlements = SimpleLazyObject(lambda: Entitlements.for_request(request))
+
+        response = self.get_response(request)
+
+        if getattr(request, 'entitlements_changed', False):
+            Entitlements.refresh(request)
+
+        return response
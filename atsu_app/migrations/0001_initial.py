@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Analysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_title', models.CharField(blank=True, max_length=200)),
+                ('company_name', models.CharField(blank=True, max_length=200)),
+                ('job_location', models.CharField(blank=True, max_length=200)),
+                ('score', models.PositiveSmallIntegerField(default=0)),
+                ('keyword_match', models.PositiveSmallIntegerField(default=0)),
+                ('skills_match', models.PositiveSmallIntegerField(default=0)),
+                ('experience_relevance', models.PositiveSmallIntegerField(default=0)),
+                ('format_structure', models.PositiveSmallIntegerField(default=0)),
+                ('keywords', models.JSONField(blank=True, default=list)),
+                ('improvements', models.JSONField(blank=True, default=list)),
+                ('strengths', models.JSONField(blank=True, default=list)),
+                ('version', models.PositiveIntegerField(default=1, editable=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='analyses', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'analyses',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
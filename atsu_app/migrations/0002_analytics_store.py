@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('atsu_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsKeyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScoreSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('analysis_ids', models.BinaryField(default=b'')),
+                ('user_ids', models.BinaryField(default=b'')),
+                ('timestamps', models.BinaryField(default=b'')),
+                ('scores', models.BinaryField(default=b'')),
+                ('keyword_match', models.BinaryField(default=b'')),
+                ('skills_match', models.BinaryField(default=b'')),
+                ('experience_relevance', models.BinaryField(default=b'')),
+                ('format_structure', models.BinaryField(default=b'')),
+                ('found_ids', models.BinaryField(default=b'')),
+                ('found_offsets', models.BinaryField(default=b'')),
+                ('missing_ids', models.BinaryField(default=b'')),
+                ('missing_offsets', models.BinaryField(default=b'')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MissingKeywordRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=100)),
+                ('keyword', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['country', '-count'],
+                'indexes': [models.Index(fields=['country', '-count'], name='atsu_app_mi_country_330bd6_idx')],
+                'constraints': [models.UniqueConstraint(fields=('country', 'keyword'), name='unique_missing_keyword_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScoreRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('role', 'Role'), ('skill', 'Skill')], max_length=10)),
+                ('key', models.CharField(max_length=200)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('score_total', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['dimension', '-count'],
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='unique_score_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserProgressRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('analysis_count', models.PositiveIntegerField(default=0)),
+                ('score_total', models.PositiveBigIntegerField(default=0)),
+                ('first_score', models.PositiveSmallIntegerField(default=0)),
+                ('latest_score', models.PositiveSmallIntegerField(default=0)),
+                ('best_score', models.PositiveSmallIntegerField(default=0)),
+                ('first_analysed_at', models.DateTimeField()),
+                ('latest_analysed_at', models.DateTimeField()),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='score_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:24
+
+from array import array
+
+import django.core.validators
+from django.db import migrations, models
+
+
+SCORE_COLUMNS = ['scores', 'keyword_match', 'skills_match', 'experience_relevance', 'format_structure']
+
+
+def recode_score_columns(from_typecode, to_typecode):
+    def recode(apps, schema_editor):
+        ScoreSegment = apps.get_model('atsu_app', 'ScoreSegment')
+        for segment in ScoreSegment.objects.all():
+            for name in SCORE_COLUMNS:
+                values = array(from_typecode)
+                values.frombytes(bytes(getattr(segment, name)))
+                setattr(segment, name, array(to_typecode, values).tobytes())
+            segment.save(update_fields=SCORE_COLUMNS)
+    return recode
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('atsu_app', '0003_user_plan'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='analysis',
+            name='experience_relevance',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='analysis',
+            name='format_structure',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='analysis',
+            name='keyword_match',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='analysis',
+            name='score',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.AlterField(
+            model_name='analysis',
+            name='skills_match',
+            field=models.PositiveSmallIntegerField(default=0, validators=[django.core.validators.MaxValueValidator(100)]),
+        ),
+        migrations.RunPython(
+            recode_score_columns('B', 'H'),
+            recode_score_columns('H', 'B'),
+        ),
+    ]
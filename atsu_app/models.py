@@ -1,3 +1,423 @@
-from django.db import models
+from array import array
+from datetime import timedelta
 
-# Create your models here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.validators import MaxValueValidator
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+class Analysis(models.Model):
+    """
+    A stored CV analysis against a job description.
+
+    The results page renders from this record. `version` is bumped on every
+    save so cached fragments and HTTP validators change whenever the
+    analysis does.
+    """
+
+    # Circumference of the score circle in results.html (2 * pi * r, r = 45)
+    SCORE_CIRCUMFERENCE = 283
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='analyses',
+        null=True,
+        blank=True,
+    )
+    job_title = models.CharField(max_length=200, blank=True)
+    company_name = models.CharField(max_length=200, blank=True)
+    job_location = models.CharField(max_length=200, blank=True)
+
+    score = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])
+    keyword_match = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])
+    skills_match = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])
+    experience_relevance = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])
+    format_structure = models.PositiveSmallIntegerField(default=0, validators=[MaxValueValidator(100)])
+
+    # [{'term': 'Python', 'status': 'found' | 'missing' | 'partial'}, ...]
+    keywords = models.JSONField(default=list, blank=True)
+
+    # [{'level': 'critical' | 'warning', 'title': ..., 'description': ...,
+    #   'example': ..., 'tags': [...], 'highlight': ...}, ...]
+    improvements = models.JSONField(default=list, blank=True)
+
+    # ['Relevant job title matches position', ...]
+    strengths = models.JSONField(default=list, blank=True)
+
+    version = models.PositiveIntegerField(default=1, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'analyses'
+
+    def __str__(self):
+        return f"{self.job_title or 'Analysis'} ({self.score})"
+
+    def save(self, *args, **kwargs):
+        """
+        Bump the version on every update so cached renders are invalidated.
+
+        The increment happens in the UPDATE itself, so concurrent edits made
+        from instances loaded at the same time each get their own version.
+        """
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+
+        self.version = F('version') + 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
+
+    @staticmethod
+    def level_for(value):
+        """Map a percentage to the critical / warning / success CSS level."""
+        if value < 50:
+            return 'critical'
+        if value < 80:
+            return 'warning'
+        return 'success'
+
+    @property
+    def score_level(self):
+        return self.level_for(self.score)
+
+    @property
+    def score_offset(self):
+        """stroke-dashoffset for the score circle."""
+        return round(self.SCORE_CIRCUMFERENCE * (100 - self.score) / 100)
+
+    @property
+    def breakdown(self):
+        """Rows for the score breakdown as (label, icon, value, level)."""
+        rows = [
+            ('Keyword Match', 'bi-bullseye', self.keyword_match),
+            ('Skills Match', 'bi-gear', self.skills_match),
+            ('Experience Relevance', 'bi-briefcase', self.experience_relevance),
+            ('Format & Structure', 'bi-file-text', self.format_structure),
+        ]
+        return [(label, icon, value, self.level_for(value)) for label, icon, value in rows]
+
+    @property
+    def critical_improvements(self):
+        return [item for item in self.improvements if item.get('level') == 'critical']
+
+    @property
+    def recommended_improvements(self):
+        return [item for item in self.improvements if item.get('level') != 'critical']
+
+    @property
+    def matched_keyword_count(self):
+        return sum(1 for keyword in self.keywords if keyword.get('status') == 'found')
+
+
+class AnalyticsKeyword(models.Model):
+    """Interned keyword term, referenced by ID from score segments."""
+
+    term = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.term
+
+
+class ScoreSegment(models.Model):
+    """
+    Append-only block of analysis results stored column by column.
+
+    Each column is a packed `array.array` of one value per analysis, so a
+    segment of SEGMENT_SIZE analyses is a handful of small blobs instead of
+    thousands of rows. Keyword hit sets use offsets into a flat ID array.
+    """
+
+    SEGMENT_SIZE = 1024
+
+    # column name -> array typecode. Score columns use 'H' so any value a
+    # PositiveSmallIntegerField accepts fits, not just valid percentages.
+    COLUMNS = {
+        'analysis_ids': 'q',
+        'user_ids': 'q',
+        'timestamps': 'q',
+        'scores': 'H',
+        'keyword_match': 'H',
+        'skills_match': 'H',
+        'experience_relevance': 'H',
+        'format_structure': 'H',
+        'found_ids': 'I',
+        'found_offsets': 'I',
+        'missing_ids': 'I',
+        'missing_offsets': 'I',
+    }
+
+    row_count = models.PositiveIntegerField(default=0)
+    analysis_ids = models.BinaryField(default=b'')
+    user_ids = models.BinaryField(default=b'')
+    timestamps = models.BinaryField(default=b'')
+    scores = models.BinaryField(default=b'')
+    keyword_match = models.BinaryField(default=b'')
+    skills_match = models.BinaryField(default=b'')
+    experience_relevance = models.BinaryField(default=b'')
+    format_structure = models.BinaryField(default=b'')
+    found_ids = models.BinaryField(default=b'')
+    found_offsets = models.BinaryField(default=b'')
+    missing_ids = models.BinaryField(default=b'')
+    missing_offsets = models.BinaryField(default=b'')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"Segment {self.pk} ({self.row_count} rows)"
+
+    @property
+    def is_full(self):
+        return self.row_count >= self.SEGMENT_SIZE
+
+    def column(self, name):
+        """Decode a column into an `array.array`."""
+        values = array(self.COLUMNS[name])
+        values.frombytes(bytes(getattr(self, name)))
+        return values
+
+    def append_row(self, **row):
+        """
+        Append one analysis to every column.
+
+        `row` holds a value per scalar column plus `found_ids` and
+        `missing_ids` as lists of AnalyticsKeyword IDs.
+        """
+        for name in self.COLUMNS:
+            if name.endswith('_offsets'):
+                continue
+            values = self.column(name)
+            if name in ('found_ids', 'missing_ids'):
+                offsets = self.column(name.replace('_ids', '_offsets'))
+                values.extend(row[name])
+                offsets.append(len(values))
+                setattr(self, name.replace('_ids', '_offsets'), offsets.tobytes())
+            else:
+                values.append(row[name])
+            setattr(self, name, values.tobytes())
+        self.row_count += 1
+
+
+class ScoreRollup(models.Model):
+    """Running score total per role or per skill, for O(1) averages."""
+
+    ROLE = 'role'
+    SKILL = 'skill'
+    DIMENSION_CHOICES = [
+        (ROLE, 'Role'),
+        (SKILL, 'Skill'),
+    ]
+
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=200)
+    count = models.PositiveIntegerField(default=0)
+    score_total = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='unique_score_rollup'),
+        ]
+        ordering = ['dimension', '-count']
+
+    def __str__(self):
+        return f"{self.get_dimension_display()}: {self.key}"
+
+    @property
+    def average_score(self):
+        return round(self.score_total / self.count, 1) if self.count else 0
+
+
+class MissingKeywordRollup(models.Model):
+    """How often a keyword was missing from CVs analysed for a country."""
+
+    country = models.CharField(max_length=100)
+    keyword = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['country', 'keyword'], name='unique_missing_keyword_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['country', '-count']),
+        ]
+        ordering = ['country', '-count']
+
+    def __str__(self):
+        return f"{self.keyword} ({self.country})"
+
+
+class UserProgressRollup(models.Model):
+    """A user's score history summarised as first, latest and best."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='score_progress',
+    )
+    analysis_count = models.PositiveIntegerField(default=0)
+    score_total = models.PositiveBigIntegerField(default=0)
+    first_score = models.PositiveSmallIntegerField(default=0)
+    latest_score = models.PositiveSmallIntegerField(default=0)
+    best_score = models.PositiveSmallIntegerField(default=0)
+    first_analysed_at = models.DateTimeField()
+    latest_analysed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user} ({self.first_score} -> {self.latest_score})"
+
+    @property
+    def average_score(self):
+        return round(self.score_total / self.analysis_count, 1) if self.analysis_count else 0
+
+    @property
+    def improvement(self):
+        return self.latest_score - self.first_score
+
+
+class UserPlan(models.Model):
+    """
+    The plan a user is on. Users without one, or whose plan has expired,
+    are on Freemium.
+    """
+
+    FREEMIUM = 'freemium'
+    PREMIUM = 'premium'
+    TIER_CHOICES = [
+        (FREEMIUM, 'Freemium'),
+        (PREMIUM, 'Premium'),
+    ]
+
+    # Limits per tier, as advertised on bundles.html
+    PLANS = {
+        FREEMIUM: {
+            'uploads': 3,
+            'downloads': 3,
+            'cv_changes': 4,
+            'cover_letter_changes': 4,
+            'paraphrasing': False,
+            'vacancy_monitors': 0,
+            'duration_days': None,
+        },
+        PREMIUM: {
+            'uploads': 15,
+            'downloads': 15,
+            'cv_changes': 100,
+            'cover_letter_changes': 15,
+            'paraphrasing': True,
+            'vacancy_monitors': 5,
+            'duration_days': 5,
+        },
+    }
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='plan',
+    )
+    tier = models.CharField(max_length=20, choices=TIER_CHOICES, default=FREEMIUM)
+    started_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    def __str__(self):
+        return f"{self.user} ({self.get_tier_display()})"
+
+    def save(self, *args, **kwargs):
+        """
+        Bump the version on every update and publish it to the cache, where
+        entitlement snapshots compare against it and rebuild if behind.
+
+        The version is published once the transaction commits, so a request
+        reading the plan in the meantime cannot cache the old version over it.
+        """
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
+        self._publish_version(self.version)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self._publish_version(0)
+        return result
+
+    def _publish_version(self, version):
+        key = self.version_cache_key(self.user_id)
+        transaction.on_commit(lambda: cache.set(key, version, None))
+
+    @staticmethod
+    def version_cache_key(user_id):
+        """Generate cache key for a user's current plan version."""
+        return f"plan_version_{user_id}"
+
+    @classmethod
+    def current_version(cls, user):
+        """
+        Get the version of a user's plan, 0 if they have none.
+
+        Served from the cache; the database is only read on a cache miss.
+        The value read is only added if the key is still missing, so it never
+        replaces a version published by a concurrent save.
+
+        Args:
+            user: Django User object or user ID
+        """
+        user_id = user.id if hasattr(user, 'id') else user
+        version = cache.get(cls.version_cache_key(user_id))
+        if version is None:
+            plan = cls.for_user(user_id)
+            version = plan.version if plan else 0
+            cache.add(cls.version_cache_key(user_id), version, None)
+        return version
+
+    @property
+    def is_active(self):
+        return self.expires_at is None or self.expires_at > timezone.now()
+
+    @property
+    def effective_tier(self):
+        return self.tier if self.is_active else self.FREEMIUM
+
+    @classmethod
+    def for_user(cls, user):
+        """
+        Get a user's plan, or None if they have never had one.
+
+        Args:
+            user: Django User object or user ID
+        """
+        user_id = user.id if hasattr(user, 'id') else user
+        return cls.objects.filter(user_id=user_id).first()
+
+    @classmethod
+    def limits_for(cls, user):
+        """Get the limits of the tier a user is currently on."""
+        plan = cls.for_user(user)
+        return cls.PLANS[plan.effective_tier if plan else cls.FREEMIUM]
+
+    @classmethod
+    def start(cls, user, tier):
+        """
+        Put a user on a tier, starting now.
+
+        Tiers with a duration (Premium's 5 days) expire automatically.
+        """
+        now = timezone.now()
+        duration_days = cls.PLANS[tier]['duration_days']
+        plan = cls.for_user(user) or cls(user=user)
+        plan.tier = tier
+        plan.started_at = now
+        plan.expires_at = now + timedelta(days=duration_days) if duration_days else None
+        plan.save()
+        return plan
@@ -0,0 +1,127 @@
+"""
+Results Cache Module
+Loads the analysis behind the results page and derives the ETag used to
+answer repeat views with 304 Not Modified.
+"""
+
+import hashlib
+import json
+
+from django.http import Http404
+
+from .models import Analysis
+
+
+# Shown on the results page until the user has an analysis of their own.
+SAMPLE_ANALYSIS = {
+    'job_title': 'Senior Software Developer',
+    'company_name': 'Tech Solutions Ltd',
+    'job_location': 'Gaborone, Botswana',
+    'score': 67,
+    'keyword_match': 45,
+    'skills_match': 72,
+    'experience_relevance': 85,
+    'format_structure': 60,
+    'keywords': [
+        {'term': 'JavaScript', 'status': 'found'},
+        {'term': 'React', 'status': 'found'},
+        {'term': 'Node.js', 'status': 'found'},
+        {'term': 'Python', 'status': 'missing'},
+        {'term': 'Django', 'status': 'missing'},
+        {'term': 'AWS', 'status': 'missing'},
+        {'term': 'CI/CD', 'status': 'found'},
+        {'term': 'Leadership', 'status': 'partial'},
+    ],
+    'improvements': [
+        {
+            'level': 'critical',
+            'highlight': 'summary',
+            'title': 'Add Quantifiable Achievements',
+            'description': 'Your summary lacks specific metrics. Add numbers like "increased sales by 30%" or "managed team of 5".',
+            'example': 'Led development of e-commerce platform serving 10,000+ daily users',
+        },
+        {
+            'level': 'critical',
+            'highlight': 'skills',
+            'title': 'Add Missing Technical Skills',
+            'description': "The job requires Python and Django, but they're not on your CV.",
+            'tags': ['Python', 'Django', 'AWS'],
+        },
+        {
+            'level': 'warning',
+            'highlight': 'experience',
+            'title': 'Expand Leadership Experience',
+            'description': 'Mention specific team size and leadership responsibilities.',
+        },
+        {
+            'level': 'warning',
+            'title': 'Use Action Verbs',
+            'description': 'Start bullet points with strong action verbs like "Architected", "Optimized", "Spearheaded".',
+        },
+    ],
+    'strengths': [
+        'Relevant job title matches position',
+        'Years of experience meets requirement',
+        'Education section is complete',
+        'Contact information is clear',
+    ],
+}
+
+
+def get_analysis(request, analysis_id=None):
+    """
+    Get the analysis to render for this request.
+
+    With an ID, the analysis must belong to the logged-in user; anyone else
+    gets a 404, so sequential IDs cannot be enumerated. Without one, the user's latest analysis is used, falling back to an
+    unsaved sample. The result is memoised on the request because the
+    validators and the view both need it.
+
+    Returns:
+        Analysis: Stored analysis, or an unsaved sample (pk is None)
+    """
+    if hasattr(request, '_results_analysis'):
+        return request._results_analysis
+
+    user_id = request.user.id if request.user.is_authenticated else None
+    analysis = None
+
+    if analysis_id is not None:
+        analysis = Analysis.objects.filter(pk=analysis_id).first()
+        if analysis is None or user_id is None or analysis.user_id != user_id:
+            raise Http404('Analysis not found')
+    elif user_id is not None:
+        analysis = Analysis.objects.filter(user_id=user_id).first()
+
+    if analysis is None:
+        analysis = Analysis(**SAMPLE_ANALYSIS)
+
+    request._results_analysis = analysis
+    return analysis
+
+
+def results_etag(request, analysis_id=None):
+    """
+    Strong ETag for the results page.
+
+    Covers the analysis version and the viewer, since the page also renders
+    the navbar for the logged-in user and their whole entitlement snapshot
+    (tier, usage, plan version and Premium expiry). There is no
+    Last-Modified for the same reason: the analysis timestamp says nothing
+    about the viewer. Flash messages are rendered once, so a pending message
+    disables the validator.
+    """
+    analysis = get_analysis(request, analysis_id)
+    if analysis.pk is None or _has_pending_messages(request):
+        return None
+
+    raw = f"{analysis.pk}:{analysis.version}:{request.user.id or 0}"
+    entitlements = getattr(request, 'entitlements', None)
+    if entitlements is not None:
+        raw += ':' + json.dumps(entitlements.data, sort_keys=True)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _has_pending_messages(request):
+    storage = getattr(request, '_messages', None)
+    return storage is not None and len(storage) > 0
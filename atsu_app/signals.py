@@ -0,0 +1,54 @@
+import copy
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .analyticsStore import ScoreAnalytics
+from .models import Analysis
+
+logger = logging.getLogger(__name__)
+
+
+def _after_commit(action, analysis, *args):
+    """
+    Run an analytics store update once the transaction commits.
+
+    Failures are logged rather than raised, so an analysis that is already
+    committed never turns into a 500.
+    """
+    def run():
+        try:
+            action(*args)
+        except Exception:
+            logger.exception('Analytics store update failed for analysis %s', analysis.pk)
+
+    transaction.on_commit(run)
+
+
+@receiver(pre_save, sender=Analysis)
+def remember_previous_analysis(sender, instance, **kwargs):
+    """Keep the stored version of an edited analysis for the rollup update."""
+    instance._analytics_previous = None
+    if instance.pk and not instance._state.adding and not kwargs.get('raw'):
+        instance._analytics_previous = Analysis.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=Analysis)
+def record_analysis(sender, instance, created, **kwargs):
+    """Add new analyses to the analytics store and replace edited ones."""
+    if kwargs.get('raw'):
+        return
+    current = copy.copy(instance)
+    if created:
+        _after_commit(ScoreAnalytics.record, current, current)
+    elif instance._analytics_previous is not None:
+        _after_commit(ScoreAnalytics.update, current, instance._analytics_previous, current)
+
+
+@receiver(post_delete, sender=Analysis)
+def remove_analysis(sender, instance, **kwargs):
+    """Take deleted analyses out of the analytics store."""
+    deleted = copy.copy(instance)
+    _after_commit(ScoreAnalytics.remove, deleted, deleted)
@@ -28,8 +28,12 @@ document.addEventListener('DOMContentLoaded', function() {
     const uploadsLeft = document.getElementById('uploadsLeft');
     const moreBtn = document.getElementById('moreBtn');
 
-    // Initialize uploads left from localStorage or default to 3
-    let remainingUploads = localStorage.getItem('remainingUploads') || 3;
+    // Initialize uploads left from localStorage or default to 3. Uploads are
+    // still only counted in the browser, so a server snapshot can only lower it.
+    let remainingUploads = localStorage.getItem('remainingUploads') || uploadsLeft.dataset.remaining || 3;
+    if (uploadsLeft.dataset.remaining !== undefined) {
+        remainingUploads = Math.min(remainingUploads, uploadsLeft.dataset.remaining);
+    }
     updateUploadsCounter();
 
     // File upload handling
@@ -1,3 +1,549 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+
+from .analysisScheduler import AnalysisScheduler, SchedulerBusy, busy_response
+from .analyticsStore import ScoreAnalytics
+from .entitlements import Entitlements
+from .models import Analysis, ScoreRollup, ScoreSegment, UserPlan
+from .resultsCache import SAMPLE_ANALYSIS
+from .uploadTrack import UploadTracker, require_upload_quota
+
+
+@require_upload_quota
+def quota_view(request):
+    if request.method == 'POST':
+        UploadTracker.increment_upload_count(request.user)
+    return JsonResponse({'ok': True})
+
+
+urlpatterns = [
+    path('quota/', quota_view),
+    path('', include('ATSU.urls')),
+]
+
+
+class ResultsViewTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_login(self.user)
+        self.analysis = Analysis.objects.create(user=self.user, **SAMPLE_ANALYSIS)
+        self.url = reverse('analysis_results', args=[self.analysis.pk])
+
+    def test_sample_is_rendered_without_etag(self):
+        self.client.logout()
+        response = self.client.get(reverse('results'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertContains(response, 'Tech Solutions Ltd')
+
+    def test_repeat_view_is_not_modified_until_edited(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.analysis.score = 90
+        self.analysis.keywords = [{'term': 'Rust', 'status': 'found'}]
+        self.analysis.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Rust')
+        self.assertContains(response, 'Strong Match')
+
+    def test_other_users_analysis_is_not_found(self):
+        User.objects.create_user('other', 'other@example.com', 'password')
+        self.client.login(username='other', password='password')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_concurrent_edits_each_bump_the_version(self):
+        first = Analysis.objects.get(pk=self.analysis.pk)
+        second = Analysis.objects.get(pk=self.analysis.pk)
+
+        first.score = 70
+        first.save()
+        second.score = 75
+        second.save(update_fields=['score'])
+
+        self.assertEqual((first.version, second.version), (2, 3))
+        self.analysis.refresh_from_db()
+        self.assertEqual(self.analysis.version, 3)
+
+    def test_ownerless_analysis_is_not_found(self):
+        orphan = Analysis.objects.create(**{**SAMPLE_ANALYSIS, 'job_title': 'Secret Role'})
+        url = reverse('analysis_results', args=[orphan.pk])
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ScoreSegmentTests(TestCase):
+
+    def row(self, analysis_id, score, found_ids, missing_ids):
+        return {
+            'analysis_ids': analysis_id,
+            'user_ids': 7,
+            'timestamps': 1700000000 + analysis_id,
+            'scores': score,
+            'keyword_match': 10,
+            'skills_match': 20,
+            'experience_relevance': 30,
+            'format_structure': 40,
+            'found_ids': found_ids,
+            'missing_ids': missing_ids,
+        }
+
+    def test_columns_round_trip_through_the_database(self):
+        segment = ScoreSegment()
+        segment.append_row(**self.row(1, 55, [3, 4], [9]))
+        segment.append_row(**self.row(2, 80, [], [5, 6, 7]))
+        segment.save()
+
+        segment = ScoreSegment.objects.get(pk=segment.pk)
+        self.assertEqual(segment.row_count, 2)
+        self.assertEqual(list(segment.column('analysis_ids')), [1, 2])
+        self.assertEqual(list(segment.column('scores')), [55, 80])
+        self.assertEqual(list(segment.column('found_ids')), [3, 4])
+        self.assertEqual(list(segment.column('found_offsets')), [2, 2])
+        self.assertEqual(list(segment.column('missing_ids')), [9, 5, 6, 7])
+        self.assertEqual(list(segment.column('missing_offsets')), [1, 4])
+
+
+class ScoreAnalyticsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('analyst', 'analyst@example.com', 'password')
+
+    def create(self, score, **fields):
+        data = {
+            **SAMPLE_ANALYSIS,
+            'job_title': 'Dev',
+            'job_location': 'Gaborone, Botswana',
+            'score': score,
+            'keywords': [
+                {'term': 'Python', 'status': 'found'},
+                {'term': 'AWS', 'status': 'missing'},
+            ],
+            **fields,
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            return Analysis.objects.create(user=self.user, **data)
+
+    def test_record_updates_rollups(self):
+        self.create(50)
+        self.create(70)
+        self.create(90, job_title='Designer', keywords=[])
+
+        self.assertEqual(ScoreAnalytics.average_score_for_role('  DEV '), 60.0)
+        self.assertEqual(ScoreAnalytics.average_score_by_role(), [
+            {'role': 'dev', 'count': 2, 'average_score': 60.0},
+            {'role': 'designer', 'count': 1, 'average_score': 90.0},
+        ])
+        self.assertEqual(ScoreAnalytics.average_score_by_skill(), [
+            {'skill': 'python', 'count': 2, 'average_score': 60.0},
+        ])
+        self.assertEqual(ScoreAnalytics.most_missing_keywords('Botswana'), [
+            {'keyword': 'aws', 'count': 2},
+        ])
+
+    def test_segments_roll_over_when_full(self):
+        ScoreSegment.SEGMENT_SIZE = 2
+        self.addCleanup(setattr, ScoreSegment, 'SEGMENT_SIZE', 1024)
+        for score in (10, 20, 30):
+            self.create(score)
+
+        segments = list(ScoreSegment.objects.all())
+        self.assertEqual([segment.row_count for segment in segments], [2, 1])
+        self.assertEqual(list(segments[0].column('scores')), [10, 20])
+        self.assertEqual(list(segments[1].column('scores')), [30])
+
+    def test_concurrent_append_is_not_lost(self):
+        self.create(10)
+        original = ScoreSegment.append_row
+        raced = []
+
+        def racing_append(segment, **row):
+            # Another writer appends between our read and our write
+            if not raced:
+                raced.append(True)
+                other = ScoreSegment.objects.get(pk=segment.pk)
+                original(other, **{**row, 'scores': 99})
+                other.save()
+            original(segment, **row)
+
+        with mock.patch.object(ScoreSegment, 'append_row', racing_append):
+            self.create(20)
+
+        segment = ScoreSegment.objects.get()
+        self.assertEqual(list(segment.column('scores')), [10, 99, 20])
+
+    def test_contended_append_starts_a_new_segment(self):
+        self.create(10)
+        original = ScoreSegment.append_row
+
+        def always_raced(segment, **row):
+            # Another writer wins every attempt on the existing segment
+            if segment.pk is not None:
+                other = ScoreSegment.objects.get(pk=segment.pk)
+                original(other, **{**row, 'scores': 99})
+                other.save()
+            original(segment, **row)
+
+        with mock.patch.object(ScoreSegment, 'append_row', always_raced):
+            self.create(20)
+
+        segments = list(ScoreSegment.objects.all())
+        self.assertEqual(list(segments[0].column('scores')), [10] + [99] * 5)
+        self.assertEqual(list(segments[1].column('scores')), [20])
+
+    def test_failed_append_keeps_rollups(self):
+        with mock.patch.object(ScoreAnalytics, '_append', side_effect=RuntimeError('segment locked')), \
+                self.assertLogs('atsu_app.signals', level='ERROR'):
+            self.create(50)
+
+        self.assertFalse(ScoreSegment.objects.exists())
+        self.assertEqual(ScoreAnalytics.average_score_for_role('dev'), 50.0)
+        self.assertEqual(ScoreAnalytics.user_improvement(self.user)['analyses'], 1)
+
+    def test_scores_above_a_byte_are_stored(self):
+        self.create(300)
+        self.assertEqual(list(ScoreSegment.objects.get().column('scores')), [300])
+        self.assertEqual(ScoreAnalytics.average_score_for_role('dev'), 300.0)
+
+    def test_country_lookup_ignores_case(self):
+        self.create(50)
+        expected = [{'keyword': 'aws', 'count': 1}]
+        self.assertEqual(ScoreAnalytics.most_missing_keywords('botswana'), expected)
+        self.assertEqual(ScoreAnalytics.most_missing_keywords(' BOTSWANA '), expected)
+        self.assertEqual(ScoreAnalytics.most_missing_keywords(), expected)
+
+    def test_user_improvement(self):
+        self.assertIsNone(ScoreAnalytics.user_improvement(self.user))
+        for score in (40, 75, 60):
+            self.create(score)
+
+        progress = ScoreAnalytics.user_improvement(self.user)
+        self.assertEqual(progress['analyses'], 3)
+        self.assertEqual(progress['first_score'], 40)
+        self.assertEqual(progress['latest_score'], 60)
+        self.assertEqual(progress['best_score'], 75)
+        self.assertEqual(progress['average_score'], 58.3)
+        self.assertEqual(progress['improvement'], 20)
+
+    def test_edit_replaces_contribution(self):
+        analysis = self.create(70)
+        self.create(30)
+
+        analysis.score = 20
+        analysis.keywords = [{'term': 'Go', 'status': 'found'}]
+        with self.captureOnCommitCallbacks(execute=True):
+            analysis.save()
+
+        self.assertEqual(ScoreAnalytics.average_score_for_role('dev'), 25.0)
+        self.assertEqual(ScoreAnalytics.average_score_by_skill(), [
+            {'skill': 'go', 'count': 1, 'average_score': 20.0},
+            {'skill': 'python', 'count': 1, 'average_score': 30.0},
+        ])
+        self.assertEqual(ScoreAnalytics.most_missing_keywords(), [{'keyword': 'aws', 'count': 1}])
+        progress = ScoreAnalytics.user_improvement(self.user)
+        self.assertEqual((progress['first_score'], progress['best_score']), (20, 30))
+
+    def test_delete_removes_contribution(self):
+        first = self.create(40)
+        second = self.create(80)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(ScoreAnalytics.average_score_for_role('dev'), 40.0)
+        self.assertEqual(ScoreAnalytics.user_improvement(self.user)['latest_score'], 40)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertIsNone(ScoreAnalytics.average_score_for_role('dev'))
+        self.assertFalse(ScoreRollup.objects.exists())
+        self.assertEqual(ScoreAnalytics.most_missing_keywords(), [])
+        self.assertIsNone(ScoreAnalytics.user_improvement(self.user))
+
+    def test_record_failure_does_not_break_the_request(self):
+        def fail(analysis):
+            raise RuntimeError('store unavailable')
+
+        original = ScoreAnalytics.record
+        ScoreAnalytics.record = staticmethod(fail)
+        self.addCleanup(setattr, ScoreAnalytics, 'record', original)
+
+        with self.assertLogs('atsu_app.signals', level='ERROR'):
+            analysis = self.create(50)
+        self.assertTrue(Analysis.objects.filter(pk=analysis.pk).exists())
+
+
+@override_settings(ROOT_URLCONF='atsu_app.tests')
+class EntitlementTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('member', 'member@example.com', 'password')
+        self.client.force_login(self.user)
+
+    def snapshot(self):
+        return signing.loads(self.client.session[Entitlements.SESSION_KEY], salt=Entitlements.SALT)
+
+    def test_upgrade_is_reflected_on_next_request(self):
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, '3 of 3 uploads left')
+        self.assertNotContains(response, 'badge bg-warning')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserPlan.start(self.user, UserPlan.PREMIUM)
+
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, '15 of 15 uploads left')
+        self.assertContains(response, 'badge bg-warning')
+        self.assertEqual(self.snapshot()['tier'], UserPlan.PREMIUM)
+
+    def test_plan_version_is_published_on_commit(self):
+        key = UserPlan.version_cache_key(self.user.id)
+        with self.captureOnCommitCallbacks() as callbacks:
+            plan = UserPlan.start(self.user, UserPlan.PREMIUM)
+            self.assertIsNone(cache.get(key))
+
+        # A request reading the plan before the commit cannot pin its version
+        cache.set(key, 0, None)
+        Entitlements.build(self.user)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(cache.get(key), plan.version)
+
+        cache.delete(key)
+        Entitlements.build(self.user)
+        self.assertEqual(cache.get(key), plan.version)
+
+    def test_expiry_change_invalidates_results_etag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            plan = UserPlan.start(self.user, UserPlan.PREMIUM)
+        analysis = Analysis.objects.create(user=self.user, **SAMPLE_ANALYSIS)
+        url = reverse('analysis_results', args=[analysis.pk])
+        etag = self.client.get(url)['ETag']
+
+        plan.expires_at = plan.expires_at.replace(year=plan.expires_at.year + 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            plan.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, plan.expires_at.strftime('Expires %-d %b %Y'))
+
+    def test_safe_request_is_answered_from_snapshot(self):
+        self.client.get('/quota/')
+
+        original_get = cache.get
+        with mock.patch.object(UploadTracker, 'get_upload_count') as get_upload_count, \
+                mock.patch.object(cache, 'get', side_effect=original_get) as cache_get, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/quota/')
+
+        self.assertEqual(response.status_code, 200)
+        get_upload_count.assert_not_called()
+        self.assertEqual(
+            [call.args[0] for call in cache_get.call_args_list],
+            [UserPlan.version_cache_key(self.user.id)],
+        )
+        self.assertFalse(any('atsu_app_userplan' in query['sql'] for query in queries))
+
+    def test_safe_request_is_refused_when_snapshot_is_exhausted(self):
+        cache.set(UploadTracker.get_cache_key(self.user.id), 3)
+        response = self.client.get('/quota/')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['stats']['remaining'], 0)
+
+    def test_post_refreshes_snapshot_when_counter_changes(self):
+        self.client.get('/quota/')
+        self.assertEqual(self.snapshot()['used']['uploads'], 0)
+
+        response = self.client.post('/quota/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.wsgi_request.entitlements_changed)
+        self.assertEqual(self.snapshot()['used']['uploads'], 1)
+        self.assertContains(self.client.get(reverse('index')), '2 of 3 uploads left')
+
+    def test_post_is_checked_against_authoritative_counter(self):
+        self.client.get('/quota/')
+        cache.set(UploadTracker.get_cache_key(self.user.id), 3)
+
+        response = self.client.post('/quota/')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['stats']['used'], 3)
+        self.assertFalse(getattr(response.wsgi_request, 'entitlements_changed', False))
+
+
+class AnalysisSchedulerTests(SimpleTestCase):
+
+    def make_scheduler(self, workers=1, max_depth=50, user_concurrency=1, max_queued_per_user=50):
+        return AnalysisScheduler(
+            workers=workers,
+            weights={'premium': 4, 'freemium': 1},
+            max_depth={'premium': max_depth, 'freemium': max_depth},
+            user_concurrency={'premium': user_concurrency, 'freemium': user_concurrency},
+            max_queued_per_user=max_queued_per_user,
+            estimated_job_seconds=3,
+        )
+
+    def gate(self):
+        gate = threading.Event()
+        self.addCleanup(gate.set)
+        return gate
+
+    def block(self, scheduler, tier='freemium', user_key='blocker'):
+        """Occupy a worker until the returned gate is set."""
+        gate, started = self.gate(), threading.Event()
+
+        def blocker():
+            started.set()
+            gate.wait()
+
+        future = scheduler.submit(user_key, tier, blocker)
+        self.assertTrue(started.wait(5))
+        return gate, future
+
+    def wait_for(self, predicate):
+        deadline = time.monotonic() + 5
+        while not predicate():
+            self.assertLess(time.monotonic(), deadline, 'Timed out waiting for scheduler')
+            time.sleep(0.01)
+
+    def run_in_order(self, scheduler, jobs):
+        """Queue (user_key, tier, tag) jobs behind a blocker and return the run order."""
+        order = []
+        gate, blocker = self.block(scheduler)
+        futures = [
+            scheduler.submit(user_key, tier, order.append, tag)
+            for user_key, tier, tag in jobs
+        ]
+        gate.set()
+        for future in [blocker] + futures:
+            future.result(timeout=5)
+        return ''.join(order)
+
+    def test_tiers_share_workers_by_weight(self):
+        scheduler = self.make_scheduler()
+        jobs = [(f'f{i}', 'freemium', 'F') for i in range(10)]
+        jobs += [(f'p{i}', 'premium', 'P') for i in range(8)]
+
+        self.assertEqual(self.run_in_order(scheduler, jobs), 'PPPPPFPPPF' + 'F' * 8)
+
+    def test_idle_tier_does_not_bank_credit(self):
+        scheduler = self.make_scheduler()
+        for future in [scheduler.submit(f'p{i}', 'premium', lambda: None) for i in range(20)]:
+            future.result(timeout=5)
+        self.wait_for(lambda: scheduler.stats()['busy'] == 0)
+
+        jobs = [(f'f{i}', 'freemium', 'F') for i in range(3)]
+        jobs += [(f'p{i}', 'premium', 'P') for i in range(5)]
+        order = self.run_in_order(scheduler, jobs)
+
+        # Freemium resumes at the current virtual time rather than replaying
+        # the 20 premium turns it sat out
+        self.assertEqual(order[:6].count('P'), 5)
+        self.assertGreaterEqual(scheduler._pass['freemium'], scheduler._pass['premium'] - 1)
+
+    def test_capped_user_does_not_block_others(self):
+        scheduler = self.make_scheduler(workers=2)
+        gate, first = self.block(scheduler, user_key='busy-user')
+        second_started, other_started = threading.Event(), threading.Event()
+
+        second = scheduler.submit('busy-user', 'freemium', second_started.set)
+        other = scheduler.submit('other-user', 'freemium', other_started.set)
+
+        self.assertTrue(other_started.wait(5))
+        self.assertFalse(second_started.is_set())
+
+        gate.set()
+        for future in (first, second, other):
+            future.result(timeout=5)
+        self.assertTrue(second_started.is_set())
+
+    def test_full_tier_queue_is_rejected(self):
+        scheduler = self.make_scheduler(max_depth=2)
+        self.block(scheduler)
+        scheduler.submit('a', 'freemium', lambda: None)
+        scheduler.submit('b', 'freemium', lambda: None)
+
+        with self.assertRaises(SchedulerBusy) as raised:
+            scheduler.submit('c', 'freemium', lambda: None)
+
+        # Two queued plus the new job, 3 s each, on the only worker
+        self.assertEqual(raised.exception.retry_after, 9)
+        # Premium has its own queue and is still accepted
+        scheduler.submit('d', 'premium', lambda: None)
+
+        response = busy_response(raised.exception)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '9')
+
+    def test_user_backlog_is_rejected(self):
+        scheduler = self.make_scheduler(max_queued_per_user=1)
+        self.block(scheduler)
+        scheduler.submit('a', 'freemium', lambda: None)
+
+        with self.assertRaises(SchedulerBusy) as raised:
+            scheduler.submit('a', 'freemium', lambda: None)
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        scheduler.submit('b', 'freemium', lambda: None)
+
+    def test_jobs_recycle_database_connections(self):
+        scheduler = self.make_scheduler()
+        calls = []
+
+        def job():
+            calls.append('job')
+            raise ValueError('bad CV')
+
+        with mock.patch('atsu_app.analysisScheduler.close_old_connections',
+                        side_effect=lambda: calls.append('close')):
+            future = scheduler.submit('a', 'freemium', job)
+            with self.assertRaises(ValueError):
+                future.result(timeout=5)
+            self.wait_for(lambda: len(calls) == 3)
+
+        self.assertEqual(calls, ['close', 'job', 'close'])
+
+    def test_stats_counters(self):
+        scheduler = self.make_scheduler(max_depth=1)
+        gate, blocker = self.block(scheduler)
+        queued = scheduler.submit('a', 'freemium', lambda: None)
+        with self.assertRaises(SchedulerBusy):
+            scheduler.submit('b', 'freemium', lambda: None)
+
+        stats = scheduler.stats()
+        self.assertEqual(stats['busy'], 1)
+        self.assertEqual(stats['tiers']['freemium']['depth'], 1)
+        self.assertGreater(stats['tiers']['freemium']['expected_wait'], 0)
+
+        gate.set()
+        blocker.result(timeout=5)
+        queued.result(timeout=5)
+        self.wait_for(lambda: scheduler.stats()['tiers']['freemium']['completed'] == 2)
+
+        stats = scheduler.stats()['tiers']['freemium']
+        self.assertEqual(
+            (stats['submitted'], stats['rejected'], stats['completed'], stats['depth']),
+            (2, 1, 2, 0),
+        )
+        self.assertEqual(scheduler.expected_wait('freemium'), 0)
@@ -7,6 +7,10 @@ from django.core.cache import cache
 from django.contrib.auth.models import User
 from functools import wraps
 from django.http import JsonResponse
+from .models import UserPlan
+
+# Requests that cannot change a counter
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
 
 
 class UploadTracker:
@@ -14,9 +18,6 @@ class UploadTracker:
     Tracks and manages user upload limits.
     """
 
-    # Default upload limit per user
-    DEFAULT_UPLOAD_LIMIT = 3
-
     # Cache timeout in seconds (24 hours)
     CACHE_TIMEOUT = 86400
 
@@ -25,6 +26,33 @@ class UploadTracker:
         """Generate cache key for user upload count."""
         return f"upload_count_{user_id}"
 
+    @staticmethod
+    def get_upload_limit(user):
+        """
+        Get the upload limit of the user's current plan.
+
+        Args:
+            user: Django User object or user ID
+
+        Returns:
+            int: Upload limit
+        """
+        return UserPlan.limits_for(user)['uploads']
+
+    @staticmethod
+    def get_upload_count(user):
+        """
+        Get the number of uploads a user has made.
+
+        Args:
+            user: Django User object or user ID
+
+        Returns:
+            int: Current upload count
+        """
+        user_id = user.id if hasattr(user, 'id') else user
+        return cache.get(UploadTracker.get_cache_key(user_id), 0)
+
     @staticmethod
     def get_remaining_uploads(user):
         """
@@ -36,14 +64,10 @@ class UploadTracker:
         Returns:
             int: Number of remaining uploads
         """
-        user_id = user.id if hasattr(user, 'id') else user
-        cache_key = UploadTracker.get_cache_key(user_id)
-
-        # Get current count from cache, default to 0
-        current_count = cache.get(cache_key, 0)
+        current_count = UploadTracker.get_upload_count(user)
 
         # Calculate remaining uploads
-        remaining = UploadTracker.DEFAULT_UPLOAD_LIMIT - current_count
+        remaining = UploadTracker.get_upload_limit(user) - current_count
         return max(0, remaining)
 
     @staticmethod
@@ -107,18 +131,31 @@ class UploadTracker:
         Returns:
             dict: Dictionary with upload statistics
         """
-        user_id = user.id if hasattr(user, 'id') else user
-        cache_key = UploadTracker.get_cache_key(user_id)
+        return UploadTracker.build_upload_stats(
+            UploadTracker.get_upload_count(user),
+            UploadTracker.get_upload_limit(user),
+        )
 
-        current_count = cache.get(cache_key, 0)
-        remaining = UploadTracker.get_remaining_uploads(user)
+    @staticmethod
+    def build_upload_stats(current_count, limit):
+        """
+        Build upload statistics from a count and limit already read.
+
+        Args:
+            current_count: Uploads used
+            limit: Upload limit of the user's plan
+
+        Returns:
+            dict: Dictionary with upload statistics
+        """
+        remaining = max(0, limit - current_count)
 
         return {
-            'total_limit': UploadTracker.DEFAULT_UPLOAD_LIMIT,
+            'total_limit': limit,
             'used': current_count,
             'remaining': remaining,
             'can_upload': remaining > 0,
-            'percentage_used': (current_count / UploadTracker.DEFAULT_UPLOAD_LIMIT) * 100
+            'percentage_used': (current_count / limit) * 100
         }
 
 
@@ -126,6 +163,10 @@ def require_upload_quota(view_func):
     """
     Decorator to check if user has remaining uploads before allowing access to view.
 
+    Read-only requests are checked against the entitlement snapshot on the
+    request. Mutating requests go to the authoritative counter, and flag the
+    snapshot for a refresh if the view changed it.
+
     Usage:
         @require_upload_quota
         def upload_view(request):
@@ -140,18 +181,35 @@ def require_upload_quota(view_func):
                 'error': 'Authentication required'
             }, status=401)
 
-        if not UploadTracker.can_upload(request.user):
-            return JsonResponse({
-                'error': 'Upload limit reached',
-                'message': 'You have reached your upload limit. Please contact support for more uploads.',
-                'stats': UploadTracker.get_upload_stats(request.user)
-            }, status=403)
+        entitlements = getattr(request, 'entitlements', None)
+        if request.method in SAFE_METHODS and entitlements is not None:
+            if not entitlements.can_upload:
+                return _upload_limit_response(entitlements.upload_stats())
+            return view_func(request, *args, **kwargs)
 
-        return view_func(request, *args, **kwargs)
+        used = UploadTracker.get_upload_count(request.user)
+        limit = UploadTracker.get_upload_limit(request.user)
+        if used >= limit:
+            return _upload_limit_response(UploadTracker.build_upload_stats(used, limit))
+
+        response = view_func(request, *args, **kwargs)
+
+        if UploadTracker.get_upload_count(request.user) != used:
+            request.entitlements_changed = True
+
+        return response
 
     return wrapper
 
 
+def _upload_limit_response(stats):
+    return JsonResponse({
+        'error': 'Upload limit reached',
+        'message': 'You have reached your upload limit. Please contact support for more uploads.',
+        'stats': stats
+    }, status=403)
+
+
 # Example usage in views.py:
 """
 from .uploads_track import UploadTracker, require_upload_quota
@@ -7,7 +7,9 @@ urlpatterns = [
     path('sign-up/', views.sign_up, name='sign_up'),
     path('bundles/', views.bundles, name='bundles'),
     path('results/', views.results, name='results'),
+    path('results/<int:analysis_id>/', views.results, name='analysis_results'),
     path('logout/', views.user_logout, name='logout'),
-    path('dashboard/', views.dashboard, name='dashboard')
+    path('dashboard/', views.dashboard, name='dashboard'),
+    path('analysis/queue/', views.analysis_queue, name='analysis_queue'),
 
 ]
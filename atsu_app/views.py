@@ -5,7 +5,12 @@ from django.contrib import messages
 from django.http import HttpRequest, HttpResponse
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from .uploadTrack import UploadTracker, require_upload_quota
+from .resultsCache import get_analysis, results_etag
+from .analysisScheduler import get_scheduler, tier_for_request
 
 """
     Credentials:
@@ -17,10 +22,25 @@ from .uploadTrack import UploadTracker, require_upload_quota
 # Create your views here.
 
 def index(request: HttpRequest) -> HttpResponse:
-    return render(request, 'atsu_app/index.html')
+    expected_wait = get_scheduler().expected_wait(tier_for_request(request))
+    return render(request, 'atsu_app/index.html', {'expected_wait': expected_wait})
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=results_etag)
+def results(request: HttpRequest, analysis_id: int = None) -> HttpResponse:
+    """
+    Render the results page from a stored analysis.
 
-def results(request: HttpRequest) -> HttpResponse:
-    return render(request, 'atsu_app/results.html')
+    Repeat views of an unchanged analysis are answered with 304 by the
+    condition decorator; expensive fragments are cached per analysis version.
+    """
+    analysis = get_analysis(request, analysis_id)
+    return render(request, 'atsu_app/results.html', {
+        'analysis': analysis,
+        'job_title': analysis.job_title,
+        'company_name': analysis.company_name,
+        'fragment_cache_ttl': settings.RESULTS_FRAGMENT_CACHE_TTL,
+    })
 
 def dashboard(request: HttpRequest) -> HttpResponse:
     return render(request, 'atsu_app/index.html')
@@ -107,5 +127,18 @@ def sign_up(request: HttpRequest) -> HttpResponse:
 def bundles(request: HttpRequest) -> HttpResponse:
     return render(request, 'atsu_app/bundles.html')
 
-def results(request: HttpRequest) -> HttpResponse:
-    return render(request, 'atsu_app/results.html')
\ No newline at end of file
+
+def analysis_queue(request: HttpRequest) -> JsonResponse:
+    """
+    Expected wait before a new analysis would start for the user's plan tier,
+    for clients that want to show it before submitting.
+    """
+    scheduler = get_scheduler()
+    tier = tier_for_request(request)
+    tier_stats = scheduler.stats()['tiers'][tier]
+    return JsonResponse({
+        'tier': tier,
+        'expected_wait': tier_stats['expected_wait'],
+        'queue_depth': tier_stats['depth'],
+        'accepting': tier_stats['depth'] < tier_stats['max_depth'],
+    })
@@ -2,5 +2,5 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-
-]
\ No newline at end of file
+    path('', views.rolefinder, name='rolefinder'),
+]
@@ -1,3 +1,27 @@
 from django.shortcuts import render
+from django.http import HttpRequest, HttpResponse
+from atsu_app.analyticsStore import ScoreAnalytics
 
 # Create your views here.
+
+def rolefinder(request: HttpRequest) -> HttpResponse:
+    """
+    Show how roles and skills score, and which keywords CVs most often miss.
+    Served entirely from the analytics rollups.
+    """
+    role = request.GET.get('role', '').strip()
+    country = request.GET.get('country', '').strip() or None
+
+    context = {
+        'role': role,
+        'role_average': ScoreAnalytics.average_score_for_role(role) if role else None,
+        'role_scores': ScoreAnalytics.average_score_by_role(),
+        'skill_scores': ScoreAnalytics.average_score_by_skill(),
+        'missing_keywords': ScoreAnalytics.most_missing_keywords(country),
+        'country': country or ScoreAnalytics.default_country(),
+        'progress': None,
+    }
+    if request.user.is_authenticated:
+        context['progress'] = ScoreAnalytics.user_improvement(request.user)
+
+    return render(request, 'jobmatch/rolefinder.html', context)